@@ -1,37 +1,360 @@
 import dns.resolver
+import dns.asyncresolver
+import asyncio
 import requests
+from requests.adapters import HTTPAdapter
 import sys
+import os
+import argparse
 import re
 import socket
+import selectors
+import errno
 import concurrent.futures
+import multiprocessing
+import functools
+import threading
 import time
+import signal
 import csv
+from collections import Counter, OrderedDict
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+import tldextract
+
+# Optional: hyperscan (SIMD) or pyahocorasick let the parking keyword scan run as a single pass over the page
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional: uvloop (libuv) runs the DNS event loop with less per-query overhead than the stock asyncio loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Common parking page indicators - more specific to avoid false positives
+PARKING_KEYWORDS = [
+    "domain is for sale", "buy this domain", 
+    "domain parking", "parked domain", 
+    "domain may be for sale", "domain auction",
+    "this web page is parked", "this domain is parked", 
+    "purchase this domain", "inquire about this domain",
+    "domain broker", "domain for purchase",
+    "coming soon", "register.com", "domain registration",
+    "related searches", "whois lookup", "domain name",
+    "this domain is available", "pending renewal or deletion",
+    "under construction", "page is under construction", "coming soon",
+    "networksolutions", "this page is under construction",
+    "digi-searches", "why am i seeing this", "trademark free notice"
+]
+
+# VERY specific parking MX patterns to avoid false positives
+PARKING_MX_PATTERNS = [
+    "park-mx.above.com", 
+    "sedoparking.com",
+    "h-email.net",
+    "parkingcrew.net",
+    "bodis.com/parking",
+    "fabulous.com/park"
+]
+
+# Common parking service redirects - very specific
+PARKING_SERVICES = [
+    "sedoparking.com", "hugedomains.com/domain_profile", "godaddyparking.com", 
+    "parkingcrew.net", "parklogic.com", "fabulous.com/park", "bodis.com/parking",
+    "register.com/domain", "registrar.godaddy.com", "networksolutions.com/manage-it",
+    "domainsponsor", "domaincontrol.com", "namesilo.com/domain",
+    "namedrive.com", "crazydomains.com", "buydomains.com", "parked.namecheap.com",
+    "i2.cdn-image.com", "digi-searches.com", "cdn-image.com", "cdn.consentmanager.net", 
+    "delivery.consentmanager.net"
+]
+
+# Each list compiled into one alternation, so a host or URL is checked in a single pass
+PARKING_MX_RE = re.compile("|".join(re.escape(pattern) for pattern in PARKING_MX_PATTERNS), re.I)
+PARKING_URL_RE = re.compile("|".join(re.escape(service) for service in PARKING_SERVICES), re.I)
+
+# Built once at import (so once per page classification process) and shared by every page scan.
+# Hyperscan is preferred, then an Aho-Corasick automaton, then plain substring checks.
+_PARKING_KEYWORDS_LOWER = list(dict.fromkeys(keyword.lower() for keyword in PARKING_KEYWORDS))
+PARKING_SCAN_DB = None
+PARKING_AUTOMATON = None
+if hyperscan is not None:
+    PARKING_SCAN_DB = hyperscan.Database()
+    PARKING_SCAN_DB.compile(
+        expressions=[keyword.encode() for keyword in _PARKING_KEYWORDS_LOWER],
+        ids=list(range(len(_PARKING_KEYWORDS_LOWER))),
+        flags=hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH,
+        literal=True
+    )
+elif ahocorasick is not None:
+    PARKING_AUTOMATON = ahocorasick.Automaton()
+    for keyword in _PARKING_KEYWORDS_LOWER:
+        PARKING_AUTOMATON.add_word(keyword, keyword)
+    PARKING_AUTOMATON.make_automaton()
+
+# Hyperscan scratch space can't be used by two scans at once, so each thread gets its own
+_scan_scratch = threading.local()
+
+def find_parking_keywords(text):
+    """Return the set of lowercased parking keywords that occur in text."""
+    if PARKING_SCAN_DB is not None:
+        scratch = getattr(_scan_scratch, "scratch", None)
+        if scratch is None:
+            scratch = _scan_scratch.scratch = hyperscan.Scratch(PARKING_SCAN_DB)
+        
+        hits = set()
+        PARKING_SCAN_DB.scan(text.encode("utf-8"), scratch=scratch,
+                             match_event_handler=lambda keyword_id, start, end, flags, context:
+                                 hits.add(_PARKING_KEYWORDS_LOWER[keyword_id]))
+        return hits
+    
+    if PARKING_AUTOMATON is not None:
+        return {keyword for _, keyword in PARKING_AUTOMATON.iter(text)}
+    return {keyword for keyword in _PARKING_KEYWORDS_LOWER if keyword in text}
+
+@functools.lru_cache(maxsize=100000)
+def resolve_host(host):
+    """Resolve a hostname through the system resolver once per run, returning every (family, sockaddr) it has."""
+    return tuple(dict.fromkeys((family, address) for family, _, _, _, address
+                               in socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)))
+
+class PageScanner:
+    """The parts of a page the parking checks look at, extracted with selectolax's lexbor (C) parser.
+    
+    Script and style contents aren't text a visitor sees, so they are dropped before the text
+    is extracted."""
+    
+    WHOIS_LINK_RE = re.compile(r'Whois\s+Lookup', re.I)
+    
+    def __init__(self, html):
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(["script", "style"])
+        
+        title_node = tree.css_first("title")
+        self.title = title_node.text() if title_node else ""
+        self.text = tree.root.text() if tree.root else ""
+        
+        anchors = tree.css("a")
+        self.anchor_count = len(anchors)
+        self.whois_link = any(self.WHOIS_LINK_RE.search(anchor.text()) for anchor in anchors)
+        self.cdn_image = tree.css_first('img[src*="cdn-image.com"]') is not None
+        self.digi_searches_link = tree.css_first('a[href*="digi-searches.com"]') is not None
+
+def classify_page(url, html):
+    """Check if a fetched page (final URL and HTML) looks like a parked domain, returning (is_parked, reason).
+    
+    Only depends on its arguments and module-level data, so it can run in a worker process."""
+    # Check for common parking service redirects - very specific
+    if PARKING_URL_RE.search(url):
+        return True, "Redirects to parking service"
+    
+    # Check content for parking indicators
+    try:
+        page = PageScanner(html)
+        
+        # Extract text from title and body
+        title = page.title.lower()
+        
+        # Look for very specific parking indicators in title
+        title_hits = find_parking_keywords(title)
+        for keyword in PARKING_KEYWORDS:
+            if keyword.lower() in title_hits:
+                return True, f"Contains parking keyword in title: '{keyword}'"
+        
+        # More strict checks to avoid false positives
+        body_text = page.text.lower()
+        body_hits = find_parking_keywords(body_text)
+        parking_phrase_count = sum(1 for keyword in PARKING_KEYWORDS if keyword.lower() in body_hits)
+        
+        # Need multiple parking phrases to consider it parked
+        if parking_phrase_count >= 3:
+            return True, f"Contains multiple parking keywords ({parking_phrase_count})"
+        
+        # The remaining checks stop at the first match; the Network Solutions indicators come
+        # before the generic parking patterns, so their reason wins when both apply
+        under_construction = "under construction" in body_text
+        
+        # Additional content checks for Network Solutions and similar 'under construction' pages
+        if (under_construction and ("related searches" in body_text or "this domain" in body_text
+                                    or "why am i seeing this" in body_text or "networksolutions.com" in html)
+                or "trademark free notice" in body_text
+                or "cdn-image.com" in html or "digi-searches.com" in html
+                or "trademark" in body_text and "notice" in body_text and "networksolutions" in html.lower()):
+            return True, "Detected Network Solutions 'Under Construction' page"
+        
+        if page.cdn_image or page.digi_searches_link:
+            return True, "Detected Network Solutions 'Under Construction' page"
+        
+        if "page is under construction" in body_text and page.anchor_count > 5:
+            return True, "Detected Network Solutions 'Under Construction' page"
+        
+        # Also check for standard parking patterns
+        if ("parked" in title
+                or "coming soon" in title and "domain" in title
+                or "coming soon" in body_text and "register" in body_text and "domain" in body_text
+                or "domain" in title and "register" in body_text and ("for sale" in body_text or "parked" in body_text)
+                or "whois lookup" in body_text and "domain registration" in body_text
+                or "copyright" in body_text and "register.com" in body_text):
+            return True, "Detected parking page pattern"
+        
+        # Checks that depend on the links
+        body_length = len(body_text.strip())
+        if ("related searches" in body_text and page.anchor_count > 10
+                or body_length < 300 and page.anchor_count > 15 and "domain" in body_text
+                or body_length < 800 and page.whois_link):
+            return True, "Detected parking page pattern"
+        
+    except Exception as e:
+        return False, f"Could not parse HTML content: {str(e)}"
+        
+    return False, "Not parked"
+
+def _ignore_sigint():
+    """Process pool initializer: leave Ctrl-C to the main process, which cancels the run cleanly."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire a fixed number of seconds after being stored."""
+    
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        """Store value for key, evicting the least recently used entries if the cache is full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
 
 class DomainValidator:
-    def __init__(self):
-        # Common parking page indicators - more specific to avoid false positives
-        self.PARKING_KEYWORDS = [
-            "domain is for sale", "buy this domain", 
-            "domain parking", "parked domain", 
-            "domain may be for sale", "domain auction",
-            "this web page is parked", "this domain is parked", 
-            "purchase this domain", "inquire about this domain",
-            "domain broker", "domain for purchase",
-            "coming soon", "register.com", "domain registration",
-            "related searches", "whois lookup", "domain name",
-            "this domain is available", "pending renewal or deletion",
-            "under construction", "page is under construction", "coming soon",
-            "networksolutions", "this page is under construction",
-            "digi-searches", "why am i seeing this", "trademark free notice"
-        ]
-
-    def check_domain_validity(self, domain):
-        """Comprehensive check of domain including DNS records and domain status."""
+    # Parking detection only needs the title and the start of the page
+    MAX_BODY_BYTES = 65536
+    
+    # Content types that can't be a parking page, so their bodies are never downloaded
+    NON_HTML_TYPES = ("image/", "audio/", "video/", "font/", "application/octet-stream", "application/pdf",
+                      "application/zip")
+    
+    # How many result rows to write before flushing the CSV file to disk
+    CSV_FLUSH_INTERVAL = 100
+    
+    # Domains are lowercased before matching, so only lowercase letters are needed
+    _DOMAIN_RE = re.compile(r"^[a-z0-9][-a-z0-9]*(\.[a-z0-9][-a-z0-9]*)+$")
+    
+    def __init__(self, max_workers=50, dns_timeout=1.0, dns_lifetime=2.0, parse_processes=None):
+        self.max_workers = max_workers
+        
+        # Shared resolver with explicit bounds, so a single unresponsive nameserver
+        # can't hold a worker for the dnspython defaults
+        self.resolver = dns.asyncresolver.Resolver()
+        self.resolver.timeout = dns_timeout
+        self.resolver.lifetime = dns_lifetime
+        
+        # Answers (including negative ones) are kept for their TTL, so subdomains of the
+        # same domain and repeated rows don't go back out to the network
+        self.resolver.cache = dns.resolver.LRUCache(50000)
+        
+        # DNS queries run as coroutines on one background event loop, so any number of them
+        # can be in flight without each holding a thread. Shared pool for the per-domain HTTP
+        # probes, so independent requests for one domain run in parallel instead of one after
+        # another. Both are started on first use and shut down by close().
+        self.dns_loop = None
+        self.dns_thread = None
+        self.io_workers = max_workers * 4
+        self.io_pool = None
+        self._background_lock = threading.Lock()
+        
+        # One pooled session for every probe, so connections (and TLS sessions) are reused
+        # between the HTTPS/HTTP attempts and redirects instead of being rebuilt per request.
+        # The pools are sized to the probe threads, so kept-alive connections aren't discarded
+        # when more hosts are in flight than the adapter has room for.
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'})
+        adapter = HTTPAdapter(pool_connections=max_workers * 4, pool_maxsize=max_workers * 4, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Liveness results shared by all workers, so a root domain that many subdomains fall
+        # back to is only probed once
+        self.liveness_cache = TTLCache(maxsize=50000, ttl=300)
+        
+        # Liveness probes currently running, so a domain being probed by one worker isn't probed
+        # again by another (e.g. a root domain that several subdomains fall back to at once)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        
+        # Names that came back NXDOMAIN, so deeper subdomains of them are rejected without a query
+        self.nxdomain_cache = TTLCache(maxsize=50000, ttl=300)
+        
+        # Public suffix aware root domain extraction, using the bundled suffix list (no network fetch)
+        self.tld_extract = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+        
+        # Page classification is CPU-bound Python, so it runs in worker processes to get real
+        # parallelism instead of contending for the GIL with the I/O threads (0 keeps it in-thread).
+        # Workers are spawned rather than forked, since forking a threaded process isn't safe.
+        # The pool is started on first use and shut down by close().
+        if parse_processes is None:
+            parse_processes = os.cpu_count() or 1
+            parse_processes = parse_processes if parse_processes > 1 else 0
+        self.parse_processes = parse_processes
+        self.parse_pool = None
+        self._parse_pool_lock = threading.Lock()
+
+    def close(self):
+        """Stop the DNS loop and shut down the probe threads, HTTP connections and page classification
+        processes; the validator can still be used afterwards, and starts them again as needed."""
+        with self._background_lock:
+            loop, self.dns_loop = self.dns_loop, None
+            thread, self.dns_thread = self.dns_thread, None
+            io_pool, self.io_pool = self.io_pool, None
+        with self._parse_pool_lock:
+            pool, self.parse_pool = self.parse_pool, None
+        
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        if io_pool is not None:
+            io_pool.shutdown()
+        if pool is not None:
+            pool.shutdown()
+        self.session.close()
+
+    def check_domain_validity(self, domain, mode="both"):
+        """Comprehensive check of domain including DNS records and domain status.
+        
+        mode narrows the checks to what the caller needs: "email" trusts a working MX without probing
+        the site, "web" skips the mail records (MX, SPF, DMARC), and "both" runs everything."""
         try:
+            domain = domain.strip().lower()
+            
             # Basic format validation
-            if not re.match(r"^[a-zA-Z0-9][-a-zA-Z0-9]*(\.[a-zA-Z0-9][-a-zA-Z0-9]*)+$", domain):
+            if not self._well_formed(domain):
                 return {
                     "domain": domain,
                     "valid": False,
@@ -43,8 +366,6 @@ class DomainValidator:
                     "reason": "Invalid domain format"
                 }
             
-            domain = domain.strip().lower()
-            
             results = {
                 "domain": domain,
                 "mx_records": False,
@@ -58,66 +379,58 @@ class DomainValidator:
                 "reason": ""
             }
             
-            # VERY specific parking MX patterns to avoid false positives
-            PARKING_MX_PATTERNS = [
-                "park-mx.above.com", 
-                "sedoparking.com",
-                "h-email.net",
-                "parkingcrew.net",
-                "bodis.com/parking",
-                "fabulous.com/park"
-            ]
+            # A name below one that doesn't exist can't exist either, so skip the lookups
+            if self._under_nxdomain(domain):
+                results["status"] = "Invalid"
+                results["reason"] = "Domain does not exist (NXDOMAIN)"
+                return results
+            
+            # MX and A decide whether the domain is usable at all, so they are resolved together first
+            mx_lookup = self._submit_lookup(domain, 'MX') if mode != "web" else None
+            a_lookup = self._submit_lookup(domain, 'A')
             
             # Check MX records
             mx_parking_detected = False
             try:
-                mx_records = dns.resolver.resolve(domain, 'MX')
+                if mx_lookup is not None:
+                    mx_records = mx_lookup.result()
+                else:
+                    # Without an MX lookup, the A lookup is the one that tells whether the name exists
+                    mx_records = None
+                    a_lookup.result()
+            except dns.resolver.NXDOMAIN as e:
+                if self._nxdomain_for(e, domain):
+                    # The name doesn't exist, so there are no other records worth asking for
+                    a_lookup.cancel()
+                    self.nxdomain_cache.set(domain, True)
+                    results["status"] = "Invalid"
+                    results["reason"] = "Domain does not exist (NXDOMAIN)"
+                    return results
+                
+                # A CNAME whose target is gone: the name itself exists, it just has no records
+                mx_records = None
+            except (dns.resolver.NoAnswer, dns.resolver.NoNameservers, dns.exception.Timeout, dns.exception.DNSException):
+                mx_records = None
+            
+            if mx_records is not None:
                 results["mx_records"] = True
                 
                 # Check for parking MX patterns (much more specific now)
                 for record in mx_records:
                     mx_host = record.exchange.to_text().lower()
-                    for pattern in PARKING_MX_PATTERNS:
-                        if pattern in mx_host:
-                            mx_parking_detected = True
-                            results["parking_mx"] = mx_host
-                            break
-                    if mx_parking_detected:
+                    if PARKING_MX_RE.search(mx_host):
+                        mx_parking_detected = True
+                        results["parking_mx"] = mx_host
                         break
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers, dns.exception.DNSException):
-                pass
                 
-            # Check A records if no MX records
-            try:
-                a_records = dns.resolver.resolve(domain, 'A')
+            # Check A records
+            if self._lookup_result(a_lookup) is not None:
                 results["a_records"] = True
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers, dns.exception.DNSException):
-                pass
-                
-            # Check SPF record (but don't invalidate for restrictive SPF)
-            try:
-                txt_records = dns.resolver.resolve(domain, 'TXT')
-                for record in txt_records:
-                    record_text = record.to_text()
-                    if "v=spf1" in record_text:
-                        results["spf_record"] = record_text
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers, dns.exception.DNSException):
-                pass
-                
-            # Check DMARC record
-            try:
-                dmarc_records = dns.resolver.resolve(f"_dmarc.{domain}", 'TXT')
-                for record in dmarc_records:
-                    record_text = record.to_text()
-                    if "v=DMARC1" in record_text:
-                        results["dmarc_record"] = record_text
-            except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers, dns.exception.DNSException):
-                pass
                 
             # Decision logic for DNS records - only invalidate for no DNS records or clear parking
             if not results["mx_records"] and not results["a_records"]:
                 results["status"] = "Invalid"
-                results["reason"] = "No MX or A records found"
+                results["reason"] = "No MX or A records found" if mode != "web" else "No A records found"
                 return results
             
             if results.get("parking_mx", False):
@@ -126,33 +439,59 @@ class DomainValidator:
                 results["reason"] = f"Domain uses parking MX: {results['parking_mx']}"
                 return results
             
-            # If we've made it here, the domain passes DNS checks
-            # Now check if the domain is actually live
-            domain_status = self.check_domain_liveness(domain)
+            # SPF and DMARC are only collected, not used for the decision, so resolve them while
+            # the liveness check runs rather than ahead of it
+            if mode != "web":
+                txt_lookup = self._submit_lookup(domain, 'TXT')
+                dmarc_lookup = self._submit_lookup(f"_dmarc.{domain}", 'TXT')
             
-            # Set site_live based on domain status
-            results["site_live"] = domain_status["status"] == "live"
-            results["domain_details"] = domain_status["details"]
-            
-            # Check if the domain is parked
-            if domain_status["status"] == "parked":
-                results["parked_domain"] = True
-                results["status"] = "Invalid"
-                results["reason"] = domain_status["details"]
-            elif domain_status["status"] == "dead":
-                # Site is not live
-                if results["mx_records"]:
-                    # MX records exist but site is dead - Risky
-                    results["status"] = "Risky"
-                    results["reason"] = "Has MX records but site isn't live"
-                else:
-                    # No MX and site is dead - Invalid
+            if mode == "email" and results["mx_records"]:
+                # Mail only needs a working, non-parking MX, so the site isn't probed
+                results["status"] = "Valid"
+                results["reason"] = "Has MX records (site not checked)"
+            else:
+                # If we've made it here, the domain passes DNS checks
+                # Now check if the domain is actually live
+                domain_status = self.check_domain_liveness(domain)
+                
+                # Set site_live based on domain status
+                results["site_live"] = domain_status["status"] == "live"
+                results["domain_details"] = domain_status["details"]
+                
+                # Check if the domain is parked
+                if domain_status["status"] == "parked":
+                    results["parked_domain"] = True
                     results["status"] = "Invalid"
                     results["reason"] = domain_status["details"]
-            else:
-                # Domain is live and not parked - Valid
-                results["status"] = "Valid"
-                results["reason"] = "Domain passed all checks"
+                elif domain_status["status"] == "dead":
+                    # Site is not live
+                    if results["mx_records"]:
+                        # MX records exist but site is dead - Risky
+                        results["status"] = "Risky"
+                        results["reason"] = "Has MX records but site isn't live"
+                    else:
+                        # No MX and site is dead - Invalid
+                        results["status"] = "Invalid"
+                        results["reason"] = domain_status["details"]
+                else:
+                    # Domain is live and not parked - Valid
+                    results["status"] = "Valid"
+                    results["reason"] = "Domain passed all checks"
+            
+            if mode != "web":
+                # Check SPF record (but don't invalidate for restrictive SPF)
+                txt_records = self._lookup_result(txt_lookup)
+                for record in txt_records or []:
+                    record_text = record.to_text()
+                    if "v=spf1" in record_text:
+                        results["spf_record"] = record_text
+                    
+                # Check DMARC record
+                dmarc_records = self._lookup_result(dmarc_lookup)
+                for record in dmarc_records or []:
+                    record_text = record.to_text()
+                    if "v=DMARC1" in record_text:
+                        results["dmarc_record"] = record_text
             
             # Determine validity based on status
             results["valid"] = results["status"] == "Valid"
@@ -171,6 +510,59 @@ class DomainValidator:
                 "reason": f"Error checking records: {str(e)}"
             }
 
+    def _well_formed(self, domain):
+        """Return True if a stripped, lowercased domain is a syntactically valid hostname worth looking up."""
+        # The length and ASCII checks reject junk before the regex runs
+        return (domain.isascii() and 1 < len(domain) <= 253 and self._DOMAIN_RE.match(domain) is not None
+                and all(len(label) <= 63 for label in domain.split('.')))
+
+    def _submit_lookup(self, name, rdtype):
+        """Start a DNS query on the background loop, returning a concurrent.futures.Future for the answer."""
+        return asyncio.run_coroutine_threadsafe(self.resolver.resolve(name, rdtype), self._dns_loop())
+
+    def _dns_loop(self):
+        """Return the background DNS event loop, starting it if needed."""
+        with self._background_lock:
+            if self.dns_loop is None:
+                self.dns_loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+                self.dns_thread = threading.Thread(target=self.dns_loop.run_forever, name="dns-loop", daemon=True)
+                self.dns_thread.start()
+            return self.dns_loop
+
+    def _io_pool(self):
+        """Return the HTTP probe thread pool, starting it if needed."""
+        with self._background_lock:
+            if self.io_pool is None:
+                self.io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.io_workers)
+            return self.io_pool
+
+    def _nxdomain_for(self, error, domain):
+        """Return True if an NXDOMAIN says domain itself doesn't exist, not just the target of a CNAME it points to."""
+        try:
+            return error.canonical_name == dns.name.from_text(domain)
+        except (TypeError, dns.exception.DNSException):
+            return False
+
+    def _under_nxdomain(self, domain):
+        """Return True if domain or one of its parent names is already known not to exist."""
+        labels = domain.split('.')
+        return any(self.nxdomain_cache.get('.'.join(labels[i:])) for i in range(len(labels) - 1))
+
+    def _lookup_result(self, future):
+        """Return the answer of a submitted DNS lookup, or None if the lookup failed."""
+        try:
+            return future.result()
+        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers, dns.exception.Timeout,
+                dns.exception.DNSException):
+            return None
+
+    def _root_domain(self, domain):
+        """Return the registrable root of a domain (example.co.uk for www.example.co.uk), or the domain itself."""
+        extracted = self.tld_extract(domain)
+        if extracted.domain and extracted.suffix:
+            return f"{extracted.domain}.{extracted.suffix}"
+        return domain
+
     def check_domain_liveness(self, domain):
         """Check if a domain is live, dead, or parked. Also checks root domain if subdomain is dead."""
         domain = domain.strip().lower()
@@ -179,14 +571,10 @@ class DomainValidator:
         domain_status = self._check_single_domain(domain)
         
         # If domain is dead and it's a subdomain, try checking the root domain
-        if domain_status["status"] == "dead" and domain.count('.') > 1:
-            # Extract the root domain (last two parts of the domain)
-            parts = domain.split('.')
-            root_domain = '.'.join(parts[-2:])
+        if domain_status["status"] == "dead":
+            root_domain = self._root_domain(domain)
             
-            # Check if there are enough parts to consider it a subdomain
-            if len(parts) > 2:
-                print(f"  Checking root domain {root_domain} for {domain}...")
+            if root_domain != domain:
                 root_status = self._check_single_domain(root_domain)
                 
                 # If root domain is live, mark as "subdomain_dead"
@@ -198,242 +586,325 @@ class DomainValidator:
         
         return domain_status
     
-    def _check_single_domain(self, domain):
-        """Check if a single domain is live, dead, or parked."""
+    def _fetch(self, url):
+        """Fetch a URL, returning (response, html) or None if it failed or returned an error status.
         
-        # Try HTTPS first
+        Only the first MAX_BODY_BYTES of a page are downloaded, and content types that clearly aren't HTML
+        (NON_HTML_TYPES) aren't read at all; a response without a Content-Type is read like HTML.
+        Neither is a page that ended up on a parking service, since its final URL already decides the check."""
         try:
-            response = requests.get(f"https://{domain}", timeout=10, allow_redirects=True, 
-                                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'})
-            
-            if response.status_code < 400:
-                is_parked, parking_reason = self.check_if_parked(domain, response)
-                if is_parked:
-                    return {"status": "parked", "details": parking_reason}
-                return {"status": "live", "details": f"HTTPS: {response.status_code}"}
-        except requests.exceptions.SSLError:
-            # SSL error, try HTTP
-            pass
+            # Short connect/read timeouts bound how long a slow host can hold the probe
+            with self.session.get(url, stream=True, timeout=(2, 3), allow_redirects=True) as response:
+                if response.status_code >= 400:
+                    return None
+                
+                html = ""
+                content_type = response.headers.get("Content-Type", "").lower()
+                if (not content_type.startswith(self.NON_HTML_TYPES)
+                        and not PARKING_URL_RE.search(response.url)):
+                    # The body can arrive in any number of chunks, so keep reading until the cap or the end
+                    body = b""
+                    for chunk in response.iter_content(self.MAX_BODY_BYTES):
+                        body += chunk
+                        if len(body) >= self.MAX_BODY_BYTES:
+                            body = body[:self.MAX_BODY_BYTES]
+                            break
+                    try:
+                        html = body.decode(response.encoding or "utf-8", errors="replace")
+                    except LookupError:
+                        html = body.decode("utf-8", errors="replace")
+                
+                return response, html
         except requests.exceptions.RequestException:
-            # Other errors, try HTTP
-            pass
+            return None
+    
+    def _check_single_domain(self, domain):
+        """Check if a single domain is live, dead, or parked, reusing a recent result if there is one.
+        
+        Concurrent checks of the same domain share one probe: the first caller runs it and the rest wait for its result."""
+        with self._inflight_lock:
+            cached = self.liveness_cache.get(domain)
+            if cached is not None:
+                return cached
+            
+            pending = self._inflight.get(domain)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[domain] = concurrent.futures.Future()
         
-        # Try HTTP if HTTPS failed
+        if not owner:
+            return pending.result()
+        
+        try:
+            result = self._probe_single_domain(domain)
+            self.liveness_cache.set(domain, result)
+            pending.set_result(result)
+            return result
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[domain]
+    
+    def _probe_single_domain(self, domain):
+        """Probe a single domain over HTTPS, HTTP and raw sockets to see if it is live, dead, or parked."""
+        
+        # A host the system resolver can't find can't be reached over HTTP or sockets either
         try:
-            response = requests.get(f"http://{domain}", timeout=10, allow_redirects=True,
-                                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'})
+            if not resolve_host(domain):
+                return {"status": "dead", "details": "Could not resolve host"}
+        except socket.gaierror:
+            return {"status": "dead", "details": "Could not resolve host"}
+        
+        # Race HTTPS and HTTP rather than waiting for HTTPS to fail before trying HTTP
+        io_pool = self._io_pool()
+        probes = {
+            io_pool.submit(self._fetch, f"https://{domain}"): "HTTPS",
+            io_pool.submit(self._fetch, f"http://{domain}"): "HTTP"
+        }
+        pending = set(probes)
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
             
-            if response.status_code < 400:
-                is_parked, parking_reason = self.check_if_parked(domain, response)
+            # Prefer HTTPS if both came back at the same time
+            for future in (f for f in probes if f in done):
+                fetched = future.result()
+                if fetched is None:
+                    continue
+                
+                for other in pending:
+                    other.cancel()
+                
+                response, html = fetched
+                is_parked, parking_reason = self.check_if_parked(domain, response, html)
                 if is_parked:
                     return {"status": "parked", "details": parking_reason}
-                return {"status": "live", "details": f"HTTP: {response.status_code}"}
-        except requests.exceptions.RequestException:
-            pass
+                return {"status": "live", "details": f"{probes[future]}: {response.status_code}"}
         
         # Check if server responds to socket connection
-        try:
-            socket.create_connection((domain, 80), timeout=5)
+        if self._probe_ports(domain):
             return {"status": "live", "details": "Socket connection successful, but HTTP failed"}
-        except (socket.timeout, socket.error):
-            try:
-                socket.create_connection((domain, 443), timeout=5)
-                return {"status": "live", "details": "Socket connection successful, but HTTP failed"}
-            except (socket.timeout, socket.error):
-                return {"status": "dead", "details": "Failed all connection attempts"}
+        return {"status": "dead", "details": "Failed all connection attempts"}
+
+    def _probe_ports(self, domain, ports=(80, 443), timeout=2):
+        """Attempt TCP connections to every address and port at once, returning True as soon as any connects."""
+        try:
+            addresses = resolve_host(domain)
+        except socket.gaierror:
+            return False
+        
+        selector = selectors.DefaultSelector()
+        sockets = []
+        try:
+            # Start a non-blocking connect on every address and port, then wait for whichever completes first,
+            # so a host whose first address is unreachable can still answer on another one
+            for family, address in addresses:
+                for port in ports:
+                    try:
+                        sock = socket.socket(family, socket.SOCK_STREAM)
+                    except OSError:
+                        # This machine can't open sockets of this family (e.g. no IPv6)
+                        break
+                    sockets.append(sock)
+                    sock.setblocking(False)
+                    if sock.connect_ex((address[0], port) + address[2:]) in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                        selector.register(sock, selectors.EVENT_WRITE)
+            
+            deadline = time.monotonic() + timeout
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, _ in selector.select(remaining):
+                    if key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                        return True
+                    selector.unregister(key.fileobj)
+            
+            return False
+        finally:
+            selector.close()
+            for sock in sockets:
+                sock.close()
+
+    def _classify_page(self, url, html):
+        """Run classify_page, in the parse process pool if there is one.
+        
+        If a pool worker dies (killed for memory, say), the pool is discarded and the page is classified
+        in this thread instead, so one crash doesn't turn off parking detection for the rest of the run."""
+        pool = self._parse_pool()
+        if pool is None:
+            return classify_page(url, html)
+        
+        try:
+            return pool.submit(classify_page, url, html).result()
+        except concurrent.futures.BrokenExecutor:
+            with self._parse_pool_lock:
+                if self.parse_pool is pool:
+                    self.parse_pool = None
+            pool.shutdown(wait=False)
+            return classify_page(url, html)
 
-    def check_if_parked(self, domain, response=None):
+    def _parse_pool(self):
+        """Return the page classification process pool, starting it if needed, or None if it is disabled."""
+        with self._parse_pool_lock:
+            if self.parse_pool is None and self.parse_processes:
+                self.parse_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.parse_processes, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_ignore_sigint)
+            return self.parse_pool
+
+    def check_if_parked(self, domain, response=None, html=None):
         """Check if a domain appears to be parked based on content analysis."""
         try:
             if not response:
-                try:
-                    response = requests.get(f"http://{domain}", timeout=10, 
-                                        headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'})
-                except:
+                fetched = self._fetch(f"http://{domain}")
+                if fetched is None:
                     return False, "Could not analyze content"
+                response, html = fetched
             
-            # Check for common parking service redirects - very specific
-            parking_services = [
-                "sedoparking.com", "hugedomains.com/domain_profile", "godaddyparking.com", 
-                "parkingcrew.net", "parklogic.com", "fabulous.com/park", "bodis.com/parking",
-                "register.com/domain", "registrar.godaddy.com", "networksolutions.com/manage-it",
-                "domainsponsor", "domaincontrol.com", "namesilo.com/domain",
-                "namedrive.com", "crazydomains.com", "buydomains.com", "parked.namecheap.com",
-                "i2.cdn-image.com", "digi-searches.com", "cdn-image.com", "cdn.consentmanager.net", 
-                "delivery.consentmanager.net"
-            ]
-            
-            if any(parking_service in response.url.lower() for parking_service in parking_services):
-                return True, "Redirects to parking service"
+            if html is None:
+                html = response.text
             
-            # Check content for parking indicators
-            try:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Extract text from title and body
-                title = soup.title.text.lower() if soup.title else ""
-                
-                # Look for very specific parking indicators in title
-                for keyword in self.PARKING_KEYWORDS:
-                    if keyword.lower() in title:
-                        return True, f"Contains parking keyword in title: '{keyword}'"
-                
-                # More strict checks to avoid false positives
-                body_text = soup.get_text().lower()
-                parking_phrase_count = 0
-                
-                for keyword in self.PARKING_KEYWORDS:
-                    if keyword.lower() in body_text:
-                        parking_phrase_count += 1
-                
-                # Need multiple parking phrases to consider it parked
-                if parking_phrase_count >= 3:
-                    return True, f"Contains multiple parking keywords ({parking_phrase_count})"
-                
-                # Additional content checks for Network Solutions and similar 'under construction' pages
-                network_solutions_indicators = [
-                    "related searches" in body_text and "under construction" in body_text,
-                    "page is under construction" in body_text and len(soup.find_all('a')) > 5,
-                    "this domain" in body_text and "under construction" in body_text,
-                    "cdn-image.com" in str(soup) or "digi-searches.com" in str(soup),
-                    "networksolutions.com" in str(soup) and "under construction" in body_text,
-                    "trademark free notice" in body_text.lower(),
-                    soup.find('img', {'src': re.compile(r'.*cdn-image\.com.*')}) is not None,
-                    soup.find('a', {'href': re.compile(r'.*digi-searches\.com.*')}) is not None,
-                    "trademark" in body_text and "notice" in body_text and "networksolutions" in str(soup).lower(),
-                    "why am i seeing this" in body_text.lower() and "under construction" in body_text.lower()
-                ]
-                
-                if any(network_solutions_indicators):
-                    return True, "Detected Network Solutions 'Under Construction' page"
-                
-                # Also check for standard parking patterns
-                parking_indicators = [
-                    "coming soon" in body_text and "register" in body_text and "domain" in body_text,
-                    "related searches" in body_text and len(soup.find_all(['a'])) > 10,
-                    "domain" in title.lower() and "register" in body_text and ("for sale" in body_text or "parked" in body_text),
-                    "whois lookup" in body_text and "domain registration" in body_text,
-                    "copyright" in body_text and "register.com" in body_text,
-                    len(body_text.strip()) < 300 and len(soup.find_all(['a'])) > 15 and "domain" in body_text,
-                    "coming soon" in title.lower() and "domain" in title.lower(),
-                    "parked" in title.lower(),
-                    soup.find('a', string=re.compile(r'Whois\s+Lookup', re.I)) is not None and len(body_text.strip()) < 800
-                ]
-                
-                if any(parking_indicators):
-                    return True, "Detected parking page pattern"
-                
-            except Exception as e:
-                return False, f"Could not parse HTML content: {str(e)}"
-                
-            return False, "Not parked"
+            return self._classify_page(response.url, html)
         
         except Exception as e:
             return False, f"Error checking parking status: {str(e)}"
 
-    def process_domain_list(self, filename, max_workers=10):
-        """Process a list of domains and check their validity."""
+    def process_domain_list(self, filename, max_workers=None, mode="both"):
+        """Process a list of domains and check their validity (see check_domain_validity for mode)."""
+        max_workers = max_workers or self.max_workers
+        
         try:
             with open(filename, 'r') as f:
                 domains = [line.strip() for line in f if line.strip() and '.' in line.strip()]
             
-            print(f"Loaded {len(domains)} domains from {filename}")
-            
-            results = {
-                "Valid": [],
-                "Invalid": [],
-                "Risky": []
-            }
+            # Repeated lines and case variants are checked once; each original line still gets its own row
+            spellings = {}
+            for domain in domains:
+                spellings.setdefault(domain.lower(), []).append(domain)
             
-            # Store the full results for CSV export
-            detailed_results = []
+            # Group subdomains with their root domain so the DNS and liveness caches get reused
+            # while the shared entries are still fresh
+            unique_domains = sorted(spellings, key=lambda d: (self._root_domain(d), d.count('.'), d))
             
-            # Use ThreadPoolExecutor for concurrent checks
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_domain = {executor.submit(self.check_domain_validity, domain): domain for domain in domains}
-                
-                # Process results as they complete
-                for i, future in enumerate(concurrent.futures.as_completed(future_to_domain)):
-                    domain = future_to_domain[future]
-                    try:
-                        result = future.result()
-                        status = result["status"]
-                        
-                        # Add to the appropriate category
-                        if status in results:
-                            results[status].append((result["domain"], result["reason"]))
-                        
-                        # Add to detailed results for CSV export
-                        detailed_results.append(result)
-                        
-                        # Print progress with appropriate emoji
-                        emoji_map = {"Valid": "✅", "Invalid": "❌", "Risky": "⚠️"}
-                        emoji = emoji_map.get(status, "❓")
-                        print(f"[{i+1}/{len(domains)}] {emoji} {status}: {result['domain']} ({result['reason']})")
-                            
-                    except Exception as e:
-                        print(f"[{i+1}/{len(domains)}] ❌ ERROR: {domain} ({str(e)})")
-                        results["Invalid"].append((domain, str(e)))
-                        
-                        # Add error result to detailed results
-                        detailed_results.append({
-                            "domain": domain,
-                            "mx_records": False,
-                            "a_records": False,
-                            "site_live": False,
-                            "parked_domain": False,
-                            "status": "Invalid",
-                            "reason": str(e)
-                        })
+            print(f"Loaded {len(domains)} domains ({len(unique_domains)} unique) from {filename}")
             
-            # Print summary
-            print("\n" + "="*50)
-            print("SUMMARY:")
-            print("="*50)
-            print(f"Total domains: {len(domains)}")
-            print(f"Valid domains: {len(results['Valid'])}")
-            print(f"Risky domains: {len(results['Risky'])}")
-            print(f"Invalid domains: {len(results['Invalid'])}")
+            # Only the per-status counts are kept in memory; each result goes straight to the CSV
+            results = Counter()
             
             # Generate filename with timestamp
             timestamp = time.strftime("%Y%m%d-%H%M%S")
             csv_filename = f'domain_validation_results_{timestamp}.csv'
             
-            # Write results to CSV file with new columns
+            # Write results to CSV file as they complete, so an interrupted run keeps its progress
             with open(csv_filename, 'w', newline='') as f:
                 writer = csv.writer(f)
                 writer.writerow(['DOMAIN', 'MX RECORD', 'A RECORD', 'SITE LIVE', 'PARKED DOMAIN', 'STATUS', 'NOTES'])
                 
-                # Write all domains
-                for result in detailed_results:
-                    writer.writerow([
-                        result["domain"],
-                        "True" if result.get("mx_records", False) else "False",
-                        "True" if result.get("a_records", False) else "False",
-                        "True" if result.get("site_live", False) else "False",
-                        "True" if result.get("parked_domain", False) else "False",
-                        result["status"],
-                        result["reason"]
-                    ])
+                # Use ThreadPoolExecutor for concurrent checks
+                with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    future_to_domain = {}
+                    for domain in unique_domains:
+                        if self._well_formed(domain):
+                            future = executor.submit(self.check_domain_validity, domain, mode)
+                        else:
+                            # Malformed lines are rejected right here instead of waiting for a worker
+                            future = concurrent.futures.Future()
+                            future.set_result(self.check_domain_validity(domain, mode))
+                        future_to_domain[future] = domain
+                    
+                    # Progress is only ever printed from this thread; the workers don't write to stdout
+                    emoji_map = {"Valid": "✅", "Invalid": "❌", "Risky": "⚠️"}
+                    interrupted = False
+                    try:
+                        # Process results as they complete
+                        for i, future in enumerate(concurrent.futures.as_completed(future_to_domain)):
+                            # Drop our reference so the finished result can be freed once it is written
+                            domain = future_to_domain.pop(future)
+                            try:
+                                result = future.result()
+                                status = result["status"]
+                            
+                                # Print progress with appropriate emoji
+                                emoji = emoji_map.get(status, "❓")
+                                print(f"[{i+1}/{len(unique_domains)}] {emoji} {status}: {result['domain']} ({result['reason']})")
+                                
+                            except Exception as e:
+                                print(f"[{i+1}/{len(unique_domains)}] ❌ ERROR: {domain} ({str(e)})")
+                            
+                                result = {
+                                    "domain": domain,
+                                    "mx_records": False,
+                                    "a_records": False,
+                                    "site_live": False,
+                                    "parked_domain": False,
+                                    "status": "Invalid",
+                                    "reason": str(e)
+                                }
+                        
+                            for original in spellings.pop(domain):
+                                results[result["status"]] += 1
+                                writer.writerow([
+                                    original,
+                                    "True" if result.get("mx_records", False) else "False",
+                                    "True" if result.get("a_records", False) else "False",
+                                    "True" if result.get("site_live", False) else "False",
+                                    "True" if result.get("parked_domain", False) else "False",
+                                    result["status"],
+                                    result["reason"]
+                                ])
+                        
+                            if (i + 1) % self.CSV_FLUSH_INTERVAL == 0:
+                                f.flush()
+                    except KeyboardInterrupt:
+                        # Drop the queued checks and only wait for the ones already running;
+                        # every row written so far stays in the CSV
+                        interrupted = True
+                        print("\nInterrupted - cancelling remaining checks...")
+                        executor.shutdown(wait=False, cancel_futures=True)
+            
+            # Print summary
+            print("\n" + "="*50)
+            print("SUMMARY:")
+            print("="*50)
+            if interrupted:
+                print(f"Interrupted after {sum(results.values())} of {len(domains)} domains")
+            print(f"Total domains: {sum(results.values()) if interrupted else len(domains)}")
+            print(f"Valid domains: {results['Valid']}")
+            print(f"Risky domains: {results['Risky']}")
+            print(f"Invalid domains: {results['Invalid']}")
             
             print(f"\nResults saved to '{csv_filename}'")
             
         except FileNotFoundError:
             print(f"Error: File '{filename}' not found.")
             sys.exit(1)
+        finally:
+            self.close()
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python domain_validator.py domains.txt [max_workers]")
-        sys.exit(1)
-    
-    filename = sys.argv[1]
-    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    parser = argparse.ArgumentParser(description="Validate a list of domains by checking DNS records, connectivity and parking.")
+    parser.add_argument("filename", help="text file containing one domain per line")
+    parser.add_argument("max_workers", nargs="?", type=int, default=50,
+                        help="number of concurrent threads to use (default: 50)")
+    parser.add_argument("--dns-timeout", type=float, default=1.0,
+                        help="seconds to wait for each nameserver to answer a DNS query (default: 1.0)")
+    parser.add_argument("--dns-lifetime", type=float, default=2.0,
+                        help="total seconds to spend on a DNS query, across retries and nameservers (default: 2.0)")
+    parser.add_argument("--parse-processes", type=int, default=None,
+                        help="worker processes for page classification, 0 to classify in the worker threads "
+                             "(default: number of CPUs, or 0 on a single CPU)")
+    parser.add_argument("--mode", choices=("both", "email", "web"), default="both",
+                        help="what the domains are validated for: 'email' accepts a working MX without probing the site, "
+                             "'web' skips the mail records (default: both)")
+    args = parser.parse_args()
     
-    validator = DomainValidator()
+    validator = DomainValidator(args.max_workers, dns_timeout=args.dns_timeout, dns_lifetime=args.dns_lifetime,
+                                parse_processes=args.parse_processes)
     
     start_time = time.time()
-    validator.process_domain_list(filename, max_workers)
+    validator.process_domain_list(args.filename, args.max_workers, mode=args.mode)
     elapsed_time = time.time() - start_time
     
     print(f"\nCompleted in {elapsed_time:.2f} seconds")